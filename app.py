@@ -1,7 +1,10 @@
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for
 from dotenv import load_dotenv
 from flask_socketio import SocketIO, emit
+from flask_session import Session
 import threading
+import queue
+import logging
 import time
 import json
 import os
@@ -17,13 +20,49 @@ load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", os.getenv("SECRET_KEY", "change-me"))
-socketio = SocketIO(app, cors_allowed_origins="*")
+
+# Keep session data server-side so each request only carries a short session
+# ID cookie. Use SESSION_TYPE=redis with REDIS_URL in production.
+app.config['SESSION_TYPE'] = os.getenv("SESSION_TYPE", "filesystem")
+app.config['SESSION_PERMANENT'] = False
+app.config['SESSION_COOKIE_HTTPONLY'] = True
+if app.config['SESSION_TYPE'] == 'redis':
+    import redis
+    app.config['SESSION_REDIS'] = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+Session(app)
+
+# Use real threads for background tasks: the bot blocks on Selenium, time.sleep
+# and executor futures, which would stall a gevent hub that is not monkey-patched
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
 # Global instances
 automation = None
 math_solver = MathSolver()
 ocr_parser = OCRParser()
 
+# OCR and solving are CPU-bound, so the automation runs them in its own pool
+# of worker processes to keep the web server responsive and to solve
+# prefetched questions in parallel
+SOLVER_WORKERS = min(4, os.cpu_count() or 1)
+
+# Progress updates are queued and flushed to clients in batches: at most
+# PROGRESS_BATCH_SIZE updates per frame, every PROGRESS_FLUSH_INTERVAL seconds.
+# Other events go through the same queue so they are never sent ahead of
+# progress queued before them
+PROGRESS_FLUSH_INTERVAL = 0.02
+PROGRESS_BATCH_SIZE = 128
+_emit_queue = queue.Queue()
+_emit_worker_lock = threading.Lock()
+_emit_worker_started = False
+
+# Held for the whole life of a bot run so a second start is rejected, and
+# briefly by login/logout so they never touch the browser during a run
+_bot_lock = threading.Lock()
+
+# Held for the duration of a login so a concurrent one is rejected rather
+# than creating or resetting the browser underneath it
+_login_lock = threading.Lock()
+
 class ProgressTracker:
     def __init__(self):
         self.questions_solved = 0
@@ -33,6 +72,7 @@ class ProgressTracker:
         self.status = "Ready"
         self.start_time = None
         self.solutions = []
+        self._last_emit = None
     
     def reset(self):
         self.__init__()
@@ -56,9 +96,21 @@ def login():
     username = data.get('username')
     password = data.get('password')
     
+    if not _login_lock.acquire(blocking=False):
+        return jsonify({'success': False, 'message': 'Login in progress'})
+    
+    # The browser is shared with the bot, so don't log in again under it
+    if not _bot_lock.acquire(blocking=False):
+        _login_lock.release()
+        return jsonify({'success': False, 'message': 'Bot is running'})
+    
     try:
         global automation
-        automation = SparxAutomation()
+        # Reuse the existing browser rather than leaking it on re-login
+        if automation is None:
+            automation = SparxAutomation(solver_workers=SOLVER_WORKERS)
+        else:
+            automation.reset_session()
         success = automation.login(school, username, password)
         
         if success:
@@ -72,6 +124,10 @@ def login():
     
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
+    
+    finally:
+        _bot_lock.release()
+        _login_lock.release()
 
 @app.route('/api/start_bot', methods=['POST'])
 def start_bot():
@@ -83,6 +139,9 @@ def start_bot():
     max_delay = data.get('max_delay', 25)
     ethical_mode = data.get('ethical_mode', False)
     
+    if not _bot_lock.acquire(blocking=False):
+        return jsonify({'success': False, 'message': 'Bot is already running'})
+    
     def run_bot():
         try:
             global automation, progress_tracker
@@ -98,7 +157,7 @@ def start_bot():
             )
             
             progress_tracker.status = "Completed"
-            socketio.emit('bot_completed', {
+            _queue_emit('bot_completed', {
                 'message': 'Homework completed!',
                 'final_stats': {
                     'questions_solved': progress_tracker.questions_solved,
@@ -109,11 +168,14 @@ def start_bot():
         
         except Exception as e:
             progress_tracker.status = "Error"
-            socketio.emit('bot_error', {'message': str(e)})
+            _queue_emit('bot_error', {'message': str(e)})
+        
+        finally:
+            _bot_lock.release()
     
-    bot_thread = threading.Thread(target=run_bot)
-    bot_thread.daemon = True
-    bot_thread.start()
+    # Run the bot as a socketio background task (a real thread in threading
+    # mode) so its emits and the progress flusher are delivered while it runs
+    socketio.start_background_task(run_bot)
     
     return jsonify({'success': True, 'message': 'Bot started'})
 
@@ -123,13 +185,60 @@ def update_progress(data):
     progress_tracker.accuracy = data.get('accuracy', 0)
     progress_tracker.current_question = data.get('current_question', '')
     
-    socketio.emit('progress_update', {
+    payload = {
         'questions_solved': progress_tracker.questions_solved,
         'total_questions': progress_tracker.total_questions,
         'accuracy': progress_tracker.accuracy,
         'current_question': progress_tracker.current_question,
         'status': progress_tracker.status
-    })
+    }
+    
+    # Skip updates that carry nothing new; the tracker still holds the
+    # latest state for /api/progress
+    if payload == progress_tracker._last_emit:
+        return
+    
+    progress_tracker._last_emit = payload
+    _queue_emit('progress_update', payload)
+
+def _queue_emit(event, payload):
+    """Queue an event for the emit worker, preserving order with progress updates"""
+    _ensure_emit_worker()
+    _emit_queue.put((event, payload))
+
+def _ensure_emit_worker():
+    global _emit_worker_started
+    with _emit_worker_lock:
+        if not _emit_worker_started:
+            socketio.start_background_task(_emit_worker)
+            _emit_worker_started = True
+
+def _emit_worker():
+    """Drain queued events and send progress updates as one frame per flush"""
+    while True:
+        # Sleep on the queue while idle, then give updates arriving right
+        # behind the first one a moment to join its frame
+        pending = [_emit_queue.get()]
+        socketio.sleep(PROGRESS_FLUSH_INTERVAL)
+        while len(pending) < PROGRESS_BATCH_SIZE:
+            try:
+                pending.append(_emit_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        batch = []
+        for event, payload in pending:
+            if event == 'progress_update':
+                batch.append(payload)
+                continue
+            # Flush the progress queued before this event first
+            if batch:
+                socketio.emit('progress_update_batch', batch)
+                batch = []
+            socketio.emit(event, payload)
+        
+        if batch:
+            socketio.emit('progress_update_batch', batch)
 
 @app.route('/api/progress')
 def get_progress():
@@ -144,12 +253,19 @@ def get_progress():
 
 @app.route('/api/logout', methods=['POST'])
 def logout():
-    session.clear()
-    global automation
-    if automation:
-        automation.quit()
-        automation = None
-    return jsonify({'success': True})
+    # Closing the browser mid-run would crash the bot
+    if not _bot_lock.acquire(blocking=False):
+        return jsonify({'success': False, 'message': 'Bot is running'})
+    
+    try:
+        session.clear()
+        global automation
+        if automation:
+            automation.quit()
+            automation = None
+        return jsonify({'success': True})
+    finally:
+        _bot_lock.release()
 
 @socketio.on('connect')
 def handle_connect():
@@ -160,4 +276,5 @@ def handle_disconnect():
     print('Client disconnected')
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -10,7 +10,6 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from utils.math_solver import MathSolver
 from utils.ocr_parser import OCRParser
-import numpy as np
 
 class SparxShadowDemo:
     def __init__(self):
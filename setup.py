@@ -9,13 +9,93 @@ import sys
 import subprocess
 import platform
 import shutil
+import functools
+import hashlib
+import importlib
+import importlib.metadata
+import urllib.error
+import urllib.request
+from email.utils import formatdate
 from pathlib import Path
 
+CACHE_DIR = Path.home() / ".cache" / "sparx-shadow"
+REQUIREMENTS_FILE = Path(__file__).resolve().parent / "requirements.txt"
+
+# Publicly known FLASK_SECRET_KEY values that must be replaced, not kept
+SECRET_KEY_PLACEHOLDERS = {"your-secret-key-here-change-in-production", "change-me"}
+PLATFORM = platform.platform()
+
+HOMEBREW_INSTALL_URL = "https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh"
+HOMEBREW_PATHS = ["/opt/homebrew/bin/brew", "/usr/local/bin/brew"]
+
+CHROME_PATHS = {
+    "Windows": [
+        "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
+        "C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe"
+    ],
+    "Darwin": [
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+    ],
+    "Linux": [
+        "/usr/bin/google-chrome",
+        "/usr/bin/google-chrome-stable",
+        "/usr/bin/chromium-browser"
+    ]
+}
+
+@functools.lru_cache(maxsize=None)
+def _which(name):
+    """Cached shutil.which, so repeated lookups skip the PATH scan"""
+    return shutil.which(name)
+
+@functools.lru_cache(maxsize=None)
+def _exists(path):
+    """Cached existence check for a path, with environment variables expanded"""
+    return os.path.exists(os.path.expandvars(path))
+
+def _environment_fingerprint():
+    """Hash this interpreter and the distributions installed into it.
+
+    Recreating or emptying a virtualenv at the same path changes the package
+    set, so markers keyed on this go stale together with the environment.
+    """
+    importlib.invalidate_caches()
+    packages = sorted(
+        f"{dist.metadata['Name']}=={dist.version}"
+        for dist in importlib.metadata.distributions()
+    )
+    digest = hashlib.sha256()
+    for part in (sys.version, sys.executable, sys.prefix, *packages):
+        digest.update(part.encode() + b"\0")
+    return digest.hexdigest()
+
 class SparxShadowSetup:
     def __init__(self):
         self.system = platform.system()
         self.python_version = sys.version_info
         self.errors = []
+        self.chrome_paths = CHROME_PATHS.get(self.system, [])
+        
+        # Resolve the per-platform helpers once instead of branching on
+        # self.system in every step
+        self._tess_installer = {
+            "Windows": self._install_tesseract_windows,
+            "Darwin": self._install_tesseract_macos,
+            "Linux": self._install_tesseract_linux
+        }.get(self.system)
+        self._start_script_writer = (
+            self._create_start_script_windows if self.system == "Windows"
+            else self._create_start_script_unix
+        )
+        self.tesseract_path = (
+            "C:\\Program Files\\Tesseract-OCR\\tesseract.exe" if self.system == "Windows"
+            else "/usr/bin/tesseract"
+        )
+    
+    def clear_cache(self):
+        """Forget cached executable and path lookups, e.g. after installing something"""
+        _which.cache_clear()
+        _exists.cache_clear()
         
     def check_python_version(self):
         """Check if Python version is compatible"""
@@ -29,11 +109,34 @@ class SparxShadowSetup:
     def install_dependencies(self):
         """Install Python dependencies"""
         print("📦 Installing Python dependencies...")
+        # Skip the install entirely if this exact requirements.txt was
+        # already installed successfully into this exact environment
+        pip_cache = CACHE_DIR / "pip"
         try:
-            subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", "pip"], 
-                         check=True, capture_output=True)
-            subprocess.run([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"], 
-                         check=True, capture_output=True)
+            requirements = REQUIREMENTS_FILE.read_bytes()
+        except OSError as e:
+            self.errors.append(f"Failed to read {REQUIREMENTS_FILE}: {e}")
+            return False
+        
+        def install_marker():
+            key = hashlib.sha256(requirements + _environment_fingerprint().encode()).hexdigest()
+            return pip_cache / f".installed-{key}"
+        
+        if install_marker().exists():
+            print("✅ Dependencies already installed (requirements.txt and environment unchanged)")
+            return True
+        
+        # One pip run upgrades pip and installs the requirements, reusing
+        # cached wheels; skip the version check round-trip and bytecode compilation
+        pip_cache.mkdir(parents=True, exist_ok=True)
+        env = dict(os.environ, PIP_DISABLE_PIP_VERSION_CHECK="1", PYTHONDONTWRITEBYTECODE="1")
+        try:
+            subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", "--no-compile",
+                          "--cache-dir", str(pip_cache), "--prefer-binary",
+                          "pip", "-r", str(REQUIREMENTS_FILE)],
+                         check=True, env=env)
+            # Key the marker on the environment as it is after the install
+            install_marker().touch()
             print("✅ Dependencies installed successfully")
             return True
         except subprocess.CalledProcessError as e:
@@ -44,15 +147,12 @@ class SparxShadowSetup:
         """Install Tesseract OCR based on system"""
         print("📖 Installing Tesseract OCR...")
         
-        if self.system == "Windows":
-            return self._install_tesseract_windows()
-        elif self.system == "Darwin":  # macOS
-            return self._install_tesseract_macos()
-        elif self.system == "Linux":
-            return self._install_tesseract_linux()
-        else:
-            self.errors.append(f"Unsupported operating system: {self.system}")
-            return False
+        return self._tess_installer() if self._tess_installer else self._unsupported()
+    
+    def _unsupported(self):
+        """Record that the current operating system is not supported"""
+        self.errors.append(f"Unsupported operating system: {self.system}")
+        return False
     
     def _install_tesseract_windows(self):
         """Install Tesseract on Windows"""
@@ -63,7 +163,7 @@ class SparxShadowSetup:
         print("   4. Restart your terminal/IDE")
         
         # Check if Tesseract is already installed
-        if shutil.which("tesseract"):
+        if _which("tesseract"):
             print("✅ Tesseract is already installed and in PATH")
             return True
         
@@ -74,9 +174,8 @@ class SparxShadowSetup:
         ]
         
         for path in common_paths:
-            expanded_path = os.path.expandvars(path)
-            if os.path.exists(expanded_path):
-                print(f"✅ Tesseract found at: {expanded_path}")
+            if _exists(path):
+                print(f"✅ Tesseract found at: {os.path.expandvars(path)}")
                 return True
         
         self.errors.append("Tesseract not found. Please install manually.")
@@ -86,33 +185,62 @@ class SparxShadowSetup:
         """Install Tesseract on macOS"""
         try:
             # Check if Homebrew is available
-            if not shutil.which("brew"):
+            brew = self._find_brew()
+            if not brew:
                 print("📦 Installing Homebrew...")
-                subprocess.run('/bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"', 
-                             shell=True, check=True)
+                installer = self._fetch_homebrew_installer()
+                subprocess.run(["/bin/bash", str(installer)], check=True)
+                self.clear_cache()
+                brew = self._find_brew() or "brew"
             
             # Install Tesseract
-            subprocess.run(["brew", "install", "tesseract"], check=True)
+            subprocess.run([brew, "install", "tesseract"], check=True)
             print("✅ Tesseract installed successfully on macOS")
             return True
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, urllib.error.URLError) as e:
             self.errors.append(f"Failed to install Tesseract on macOS: {e}")
             return False
     
+    def _find_brew(self):
+        """Return the Homebrew executable, checking its standard locations first"""
+        for path in HOMEBREW_PATHS:
+            if _exists(path):
+                return path
+        return _which("brew")
+    
+    def _fetch_homebrew_installer(self):
+        """Download the Homebrew install script, reusing the cached copy if unchanged"""
+        cache_path = CACHE_DIR / "homebrew-install.sh"
+        request = urllib.request.Request(HOMEBREW_INSTALL_URL)
+        if cache_path.exists():
+            request.add_header("If-Modified-Since", formatdate(cache_path.stat().st_mtime, usegmt=True))
+        
+        try:
+            with urllib.request.urlopen(request) as response:
+                script = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return cache_path
+            raise
+        
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(script)
+        return cache_path
+    
     def _install_tesseract_linux(self):
         """Install Tesseract on Linux"""
         try:
             # Try apt-get (Debian/Ubuntu)
-            if shutil.which("apt-get"):
+            if _which("apt-get"):
                 subprocess.run(["sudo", "apt-get", "update"], check=True)
                 subprocess.run(["sudo", "apt-get", "install", "-y", "tesseract-ocr"], check=True)
             
             # Try yum (RHEL/CentOS)
-            elif shutil.which("yum"):
+            elif _which("yum"):
                 subprocess.run(["sudo", "yum", "install", "-y", "tesseract"], check=True)
             
             # Try dnf (Fedora)
-            elif shutil.which("dnf"):
+            elif _which("dnf"):
                 subprocess.run(["sudo", "dnf", "install", "-y", "tesseract"], check=True)
             
             else:
@@ -129,24 +257,8 @@ class SparxShadowSetup:
         """Check if Chrome is installed"""
         print("🔍 Checking Chrome installation...")
         
-        chrome_paths = {
-            "Windows": [
-                "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
-                "C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe"
-            ],
-            "Darwin": [
-                "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            ],
-            "Linux": [
-                "/usr/bin/google-chrome",
-                "/usr/bin/google-chrome-stable",
-                "/usr/bin/chromium-browser"
-            ]
-        }
-        
-        paths = chrome_paths.get(self.system, [])
-        for path in paths:
-            if os.path.exists(path):
+        for path in self.chrome_paths:
+            if _exists(path):
                 print(f"✅ Chrome found at: {path}")
                 return True
         
@@ -158,11 +270,15 @@ class SparxShadowSetup:
         """Create environment configuration file"""
         print("⚙️  Creating environment configuration...")
         
+        # Keep an existing secret key so re-running setup doesn't invalidate sessions
+        env_path = Path(".env")
+        secret_key = self._read_existing_secret_key(env_path) or os.urandom(32).hex()
+        
         env_content = f"""# Sparx Shadow Configuration
-# Generated on {platform.platform()}
+# Generated on {PLATFORM}
 
 # Flask Configuration
-FLASK_SECRET_KEY={os.urandom(32).hex()}
+FLASK_SECRET_KEY={secret_key}
 FLASK_ENV=development
 FLASK_DEBUG=True
 
@@ -175,20 +291,32 @@ UPLOAD_FOLDER=uploads
 """
         
         try:
-            with open('.env', 'w') as f:
-                f.write(env_content)
+            env_path.write_text(env_content)
             print("✅ Environment file created")
             return True
         except Exception as e:
             self.errors.append(f"Failed to create .env file: {e}")
             return False
     
+    def _read_existing_secret_key(self, env_path):
+        """Return FLASK_SECRET_KEY from an existing .env file, if any.
+
+        Empty values and placeholders such as the one in .env.example count as
+        missing, so a copied template never becomes the real signing key.
+        """
+        if not env_path.exists():
+            return None
+        for line in env_path.read_text().splitlines():
+            if line.startswith("FLASK_SECRET_KEY="):
+                key = line[len("FLASK_SECRET_KEY="):].strip()
+                if not key or key.startswith("your-secret-key") or key in SECRET_KEY_PLACEHOLDERS:
+                    return None
+                return key
+        return None
+    
     def _get_tesseract_path(self):
         """Get Tesseract executable path"""
-        if self.system == "Windows":
-            return "C:\\Program Files\\Tesseract-OCR\\tesseract.exe"
-        else:
-            return "/usr/bin/tesseract"
+        return self.tesseract_path
     
     def create_directories(self):
         """Create necessary directories"""
@@ -210,6 +338,17 @@ UPLOAD_FOLDER=uploads
         """Run basic tests to verify installation"""
         print("🧪 Running verification tests...")
         
+        # The imports below take seconds; skip them if they already passed
+        # for this exact package set, interpreter and Tesseract install
+        tesseract = _which("tesseract") or (self.tesseract_path if _exists(self.tesseract_path) else "")
+        test_key = hashlib.sha256(
+            (_environment_fingerprint() + "\0" + tesseract).encode()
+        ).hexdigest()
+        marker = CACHE_DIR / f"tests-ok-{test_key}"
+        if marker.exists():
+            print("✅ Tests cached (environment unchanged)")
+            return True
+        
         try:
             # Test imports
             import sympy
@@ -228,6 +367,8 @@ UPLOAD_FOLDER=uploads
             result = sp.solve(x**2 - 4, x)
             print(f"✅ SymPy test: Solutions to x² - 4 = 0 are {result}")
             
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.touch()
             return True
         
         except Exception as e:
@@ -260,25 +401,29 @@ UPLOAD_FOLDER=uploads
     
     def create_start_script(self):
         """Create a start script for easy launching"""
-        if self.system == "Windows":
-            script_content = """@echo off
+        self._start_script_writer()
+    
+    def _create_start_script_windows(self):
+        """Write start.bat"""
+        script_content = """@echo off
 echo Starting Sparx Shadow...
 python app.py
 pause
 """
-            with open("start.bat", "w") as f:
-                f.write(script_content)
-            print("\n📄 Created start.bat for easy launching")
-        
-        else:
-            script_content = """#!/bin/bash
+        with open("start.bat", "w") as f:
+            f.write(script_content)
+        print("\n📄 Created start.bat for easy launching")
+    
+    def _create_start_script_unix(self):
+        """Write an executable start.sh"""
+        script_content = """#!/bin/bash
 echo "Starting Sparx Shadow..."
 python3 app.py
 """
-            with open("start.sh", "w") as f:
-                f.write(script_content)
-            os.chmod("start.sh", 0o755)
-            print("\n📄 Created start.sh for easy launching")
+        with open("start.sh", "w") as f:
+            f.write(script_content)
+        os.chmod("start.sh", 0o755)
+        print("\n📄 Created start.sh for easy launching")
 
 def main():
     """Main setup function"""
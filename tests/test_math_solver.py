@@ -0,0 +1,20 @@
+import unittest
+
+from utils.math_solver import MathSolver
+
+
+class TriangleAreaTest(unittest.TestCase):
+    def setUp(self):
+        self.solver = MathSolver()
+
+    def test_sas_area_has_no_float_noise(self):
+        # Answers are typed verbatim, so 2.9999999999999996 would be marked wrong
+        result = self.solver.solve_triangle({
+            'sides': {'side_b': 3, 'side_c': 4},
+            'angles': {'angle_a': 30}
+        })
+        self.assertEqual(str(result['answer']), '3.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
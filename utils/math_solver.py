@@ -1,15 +1,99 @@
 import sympy as sp
-import numpy as np
-import re
-from sympy import symbols, solve, sin, cos, tan, pi, sqrt, simplify, expand, factor
-from sympy.geometry import Triangle, Point, Circle, Line
-import matplotlib.pyplot as plt
+import functools
+import threading
+import multiprocessing
+import concurrent.futures
+from sympy import symbols, solve, sin, cos, tan, pi, sqrt, expand, factor
+from math import sqrt as _sqrt, sin as _sin, radians as _radians
 import io
 import base64
 
+# matplotlib is slow to import and only needed for graphing, so a single
+# Agg figure is created on the first create_graph call and reused after that
+_graph = None
+_graph_lock = threading.Lock()
+
+def _get_graph():
+    """Return the shared (figure, axes, canvas) used by create_graph"""
+    global _graph
+    if _graph is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize=(8, 6))
+        ax = fig.add_subplot(111)
+        _graph = (fig, ax, FigureCanvasAgg(fig))
+    return _graph
+
+@functools.lru_cache(maxsize=2048)
+def _sympify_cached(expr_str):
+    """Parse an expression string, reusing the result for repeated strings"""
+    return sp.sympify(expr_str)
+
+@functools.lru_cache(maxsize=2048)
+def _simplify_cached(expr):
+    """Simplify a (hashable, immutable) SymPy expression, memoized"""
+    return sp.simplify(expr)
+
+@functools.lru_cache(maxsize=128)
+def _lambdify_cached(expr_str, var_name="x"):
+    """Compile an expression string to a numpy function, memoized per string"""
+    x = sp.Symbol(var_name)
+    return sp.lambdify(x, _sympify_cached(expr_str), "numpy")
+
+@functools.lru_cache(maxsize=32)
+def _linspace_cached(start, stop, num):
+    """Return a shared, read-only float32 np.linspace array"""
+    import numpy as np
+    # float32 is plenty for plotting and halves the data pushed through
+    # the evaluated function
+    values = np.linspace(start, stop, num, dtype=np.float32)
+    values.flags.writeable = False
+    return values
+
+# Errors expected from bad or unsupported input; solvers turn these into a
+# fallback answer and let anything else propagate
+SOLVER_ERRORS = (
+    sp.SympifyError,
+    sp.PolynomialError,
+    ValueError,
+    TypeError,
+    ArithmeticError,
+    AttributeError,
+    LookupError,
+    RuntimeError,
+    NotImplementedError
+)
+
+def _is_numeric(*values):
+    """True when all values are plain numbers (no SymPy symbols)"""
+    return all(isinstance(v, (int, float)) for v in values)
+
 class MathSolver:
     def __init__(self):
         self.setup_symbols()
+        self.setup_dispatch()
+        self._batch_pool = None
+    
+    def __getstate__(self):
+        # Bound methods and the process pool are rebuilt rather than pickled
+        state = self.__dict__.copy()
+        del state['_dispatch']
+        state['_batch_pool'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.setup_dispatch()
+    
+    def setup_dispatch(self):
+        """Map question types to their solver methods"""
+        self._dispatch = {
+            'equation': self.solve_equation,
+            'trigonometry': self.solve_trigonometry,
+            'geometry': self.solve_geometry,
+            'algebra': self.solve_algebra,
+            'calculus': self.solve_calculus
+        }
         
     def setup_symbols(self):
         """Setup common mathematical symbols"""
@@ -23,48 +107,83 @@ class MathSolver:
         question_type = parsed_question.get('type', 'unknown')
         content = parsed_question.get('content', '')
         
-        if question_type == 'equation':
-            return self.solve_equation(content)
-        elif question_type == 'trigonometry':
-            return self.solve_trigonometry(content)
-        elif question_type == 'geometry':
-            return self.solve_geometry(content)
-        elif question_type == 'algebra':
-            return self.solve_algebra(content)
-        elif question_type == 'calculus':
-            return self.solve_calculus(content)
-        else:
-            return self.solve_general(content)
+        return self._dispatch.get(question_type, self.solve_general)(content)
+    
+    def solve_batch(self, parsed_questions, workers=None):
+        """Solve many parsed questions in parallel across processes.
+
+        SymPy is pure Python and holds the GIL, so processes rather than
+        threads are used. The pool is created on the first call (with
+        ``workers`` processes, default one per CPU) and reused afterwards, so
+        ``workers`` is ignored on later calls until ``close`` is called.
+        """
+        if self._batch_pool is None:
+            # Spawn rather than fork, which is unsafe once threads are running
+            self._batch_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return list(self._batch_pool.map(self.solve, parsed_questions))
+    
+    def close(self):
+        """Shut down the solve_batch process pool, if one was started"""
+        pool = getattr(self, '_batch_pool', None)
+        if pool is not None:
+            self._batch_pool = None
+            # cancel_futures needs Python 3.9, which setup.py doesn't require
+            pool.shutdown(wait=False)
+    
+    def __del__(self):
+        self.close()
     
     def solve_equation(self, equation_str):
         """Solve algebraic equations"""
         try:
-            # Parse equation
-            lhs, rhs = equation_str.split('=')
-            equation = sp.Eq(sp.sympify(lhs), sp.sympify(rhs))
+            # Parse equation; "expr = 0" needs no Eq wrapper or second parse
+            lhs, _, rhs = equation_str.partition('=')
+            if rhs.strip() in ('0', '0.0'):
+                equation = _sympify_cached(lhs)
+            else:
+                equation = sp.Eq(_sympify_cached(lhs), _sympify_cached(rhs))
             
             # Solve for variables
             solutions = solve(equation, self.x)
             
-            # Format solutions
-            formatted_solutions = []
+            # Format solutions: real ones as floats from a single evalf, listed
+            # before any complex or symbolic ones
+            real_solutions = []
+            other_solutions = []
             for sol in solutions:
                 if sol.is_real:
-                    formatted_solutions.append(float(sol))
+                    real_solutions.append(float(sol.evalf(15)))
                 else:
-                    formatted_solutions.append(str(sol))
+                    other_solutions.append(str(sol))
+            formatted_solutions = real_solutions + other_solutions
             
             return {
                 'type': 'equation',
                 'original': equation_str,
                 'answer': formatted_solutions[0] if formatted_solutions else None,
                 'all_solutions': formatted_solutions,
-                'steps': self.generate_equation_steps(equation)
+                'steps': self.generate_equation_steps(equation, solutions)
             }
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(equation_str)
     
+    def solve_many(self, equation_strs):
+        """Solve a batch of independent equations.
+
+        Each distinct equation string is solved once and shares the parse
+        cache; results come back in input order, each as its own dict so
+        callers can annotate one without touching its duplicates.
+        """
+        results = {}
+        for equation_str in equation_strs:
+            if equation_str not in results:
+                results[equation_str] = self.solve_equation(equation_str)
+        return [dict(results[equation_str]) for equation_str in equation_strs]
+    
     def solve_trigonometry(self, trig_str):
         """Solve trigonometric problems"""
         try:
@@ -73,8 +192,8 @@ class MathSolver:
                 return self.solve_equation(trig_str)
             
             # Evaluate trigonometric expressions
-            expr = sp.sympify(trig_str)
-            simplified = sp.simplify(expr)
+            expr = _sympify_cached(trig_str)
+            simplified = _simplify_cached(expr)
             
             # Convert to numerical value if possible
             numerical_value = float(simplified.evalf())
@@ -87,7 +206,7 @@ class MathSolver:
                 'steps': self.generate_trig_steps(expr)
             }
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(trig_str)
     
     def solve_geometry(self, geometry_info):
@@ -106,7 +225,7 @@ class MathSolver:
             else:
                 return self.solve_general_geometry(properties)
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(str(geometry_info))
     
     def solve_triangle(self, properties):
@@ -120,8 +239,11 @@ class MathSolver:
             if 'a' in sides and 'b' in sides and 'c' in sides:
                 # All sides known - calculate area using Heron's formula
                 a, b, c = sides['a'], sides['b'], sides['c']
-                s = (a + b + c) / 2
-                area = sqrt(s * (s - a) * (s - b) * (s - c))
+                s = (a + b + c) * 0.5
+                if _is_numeric(a, b, c):
+                    area = _sqrt(s * (s - a) * (s - b) * (s - c))
+                else:
+                    area = sqrt(s * (s - a) * (s - b) * (s - c))
                 
                 return {
                     'type': 'triangle',
@@ -138,7 +260,12 @@ class MathSolver:
                 side_b = sides['side_b']
                 side_c = sides['side_c']
                 
-                area = 0.5 * side_b * side_c * sin(angle_a * pi / 180)
+                if _is_numeric(angle_a, side_b, side_c):
+                    # Round off float sin error so e.g. 30 degrees gives 3.0,
+                    # not 2.9999999999999996, as the exact path did
+                    area = round(0.5 * side_b * side_c * _sin(_radians(angle_a)), 10)
+                else:
+                    area = 0.5 * side_b * side_c * sin(angle_a * pi / 180)
                 
                 return {
                     'type': 'triangle',
@@ -149,11 +276,15 @@ class MathSolver:
             else:
                 return self.fallback_solve(str(properties))
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(str(properties))
     
-    def solve_pythagoras(self, properties):
-        """Solve Pythagorean theorem problems"""
+    def solve_pythagoras(self, properties, generate_steps=True):
+        """Solve Pythagorean theorem problems.
+
+        Pass ``generate_steps=False`` to skip building the worked steps when
+        only the answer is needed.
+        """
         try:
             a = properties.get('a')
             b = properties.get('b')
@@ -161,35 +292,41 @@ class MathSolver:
             
             if a is not None and b is not None:
                 # Find hypotenuse
-                c = sqrt(a**2 + b**2)
-                return {
+                c_squared = a*a + b*b
+                c = _sqrt(c_squared) if _is_numeric(a, b) else float(sqrt(c_squared))
+                result = {
                     'type': 'pythagoras',
-                    'answer': float(c),
-                    'steps': [f"c² = a² + b²", f"c² = {a}² + {b}²", f"c = √({a**2 + b**2}) = {float(c)}"]
+                    'answer': c
                 }
+                if generate_steps:
+                    result['steps'] = [f"c² = a² + b²", f"c² = {a}² + {b}²", f"c = √({c_squared}) = {c}"]
+                return result
             
             elif a is not None and c is not None:
                 # Find missing side
-                b = sqrt(c**2 - a**2)
-                return {
+                b_squared = c*c - a*a
+                b = _sqrt(b_squared) if _is_numeric(a, c) else float(sqrt(b_squared))
+                result = {
                     'type': 'pythagoras',
-                    'answer': float(b),
-                    'steps': [f"b² = c² - a²", f"b² = {c}² - {a}²", f"b = √({c**2 - a**2}) = {float(b)}"]
+                    'answer': b
                 }
+                if generate_steps:
+                    result['steps'] = [f"b² = c² - a²", f"b² = {c}² - {a}²", f"b = √({b_squared}) = {b}"]
+                return result
             
             else:
                 return self.fallback_solve(str(properties))
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(str(properties))
     
     def solve_algebra(self, algebra_str):
         """Solve algebraic problems"""
         try:
             # Expand and simplify expressions
-            expr = sp.sympify(algebra_str)
+            expr = _sympify_cached(algebra_str)
             expanded = expand(expr)
-            simplified = simplify(expanded)
+            simplified = _simplify_cached(expanded)
             factored = factor(simplified)
             
             return {
@@ -200,7 +337,7 @@ class MathSolver:
                 'factored': str(factored)
             }
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(algebra_str)
     
     def solve_calculus(self, calc_info):
@@ -209,7 +346,7 @@ class MathSolver:
             operation = calc_info.get('operation', '')
             function = calc_info.get('function', '')
             
-            expr = sp.sympify(function)
+            expr = _sympify_cached(function)
             
             if operation == 'derivative':
                 derivative = sp.diff(expr, self.x)
@@ -232,15 +369,15 @@ class MathSolver:
             else:
                 return self.fallback_solve(str(calc_info))
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(str(calc_info))
     
     def solve_general(self, problem_str):
         """General problem solver with fallback methods"""
         try:
             # Try to parse as expression
-            expr = sp.sympify(problem_str)
-            simplified = sp.simplify(expr)
+            expr = _sympify_cached(problem_str)
+            simplified = _simplify_cached(expr)
             numerical = float(simplified.evalf())
             
             return {
@@ -250,7 +387,7 @@ class MathSolver:
                 'exact': str(simplified)
             }
         
-        except Exception as e:
+        except SOLVER_ERRORS:
             return self.fallback_solve(problem_str)
     
     def fallback_solve(self, problem_str):
@@ -263,8 +400,12 @@ class MathSolver:
             'needs_manual_review': True
         }
     
-    def generate_equation_steps(self, equation):
-        """Generate step-by-step solution for equations"""
+    def generate_equation_steps(self, equation, solutions):
+        """Generate step-by-step solution for equations.
+
+        ``equation`` is either an ``sp.Eq`` or an expression equal to zero;
+        ``solutions`` are the already computed solutions.
+        """
         steps = []
         
         # Basic steps for linear equations
@@ -275,10 +416,13 @@ class MathSolver:
             # Move all terms to one side
             combined = lhs - rhs
             steps.append(f"Rearrange: {combined} = 0")
-            
-            # Solve
-            solutions = solve(equation, self.x)
-            steps.append(f"Solutions: {solutions}")
+        elif isinstance(equation, sp.Expr):
+            steps.append(f"Original equation: {equation} = 0")
+        else:
+            return steps
+        
+        # Solve
+        steps.append(f"Solutions: {solutions}")
         
         return steps
     
@@ -288,7 +432,7 @@ class MathSolver:
         steps.append(f"Original expression: {expr}")
         
         # Apply trigonometric identities
-        simplified = sp.simplify(expr)
+        simplified = _simplify_cached(expr)
         steps.append(f"Simplified: {simplified}")
         
         return steps
@@ -300,33 +444,52 @@ class MathSolver:
         steps.append(f"Result: {result}")
         return steps
     
-    def create_graph(self, function_str, x_range=(-10, 10)):
-        """Create a graph of a mathematical function"""
+    def create_graph(self, function_str, x_range=(-10, 10), return_base64=True):
+        """Create a graph of a mathematical function.
+
+        Returns the PNG as a base64 string, or as raw bytes when
+        ``return_base64=False`` (e.g. to serve it directly as image/png).
+        """
         try:
-            x_vals = np.linspace(x_range[0], x_range[1], 400)
+            import numpy as np
+            
+            x_vals = _linspace_cached(x_range[0], x_range[1], 400)
             
             # Convert sympy expression to numpy function
-            expr = sp.sympify(function_str)
-            f = sp.lambdify(self.x, expr, 'numpy')
+            f = _lambdify_cached(function_str)
             
-            y_vals = f(x_vals)
+            # Evaluate into a float32 array (constants broadcast to the grid).
+            # Singularities become NaN gaps, which matplotlib skips, and huge
+            # values are clipped so they can't dominate autoscaling.
+            y_vals = np.array(np.broadcast_to(f(x_vals), x_vals.shape), dtype=np.float32)
+            y_vals[~np.isfinite(y_vals)] = np.nan
+            np.clip(y_vals, -1e6, 1e6, out=y_vals)
             
-            plt.figure(figsize=(8, 6))
-            plt.plot(x_vals, y_vals, 'b-', linewidth=2, label=f'y = {function_str}')
-            plt.grid(True, alpha=0.3)
-            plt.xlabel('x')
-            plt.ylabel('y')
-            plt.title(f'Graph of {function_str}')
-            plt.legend()
+            finite = y_vals[np.isfinite(y_vals)]
+            y_limits = np.percentile(finite, [1, 99]) if finite.size else None
+            
+            # Draw on the shared figure; the lock keeps concurrent calls apart
+            with _graph_lock:
+                fig, ax, canvas = _get_graph()
+                ax.clear()
+                ax.plot(x_vals, y_vals, 'b-', linewidth=2, label=f'y = {function_str}')
+                ax.grid(True, alpha=0.3)
+                ax.set_xlabel('x')
+                ax.set_ylabel('y')
+                ax.set_title(f'Graph of {function_str}')
+                ax.legend()
+                if y_limits is not None and y_limits[0] < y_limits[1]:
+                    ax.set_ylim(y_limits)
+                
+                # Render straight to PNG bytes
+                buffer = io.BytesIO()
+                canvas.print_png(buffer)
             
-            # Save to base64 string
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png')
-            buffer.seek(0)
-            graph_base64 = base64.b64encode(buffer.read()).decode()
-            plt.close()
+            png_bytes = buffer.getvalue()
+            if not return_base64:
+                return png_bytes
             
-            return graph_base64
+            return base64.b64encode(png_bytes).decode()
         
         except Exception as e:
             print(f"Graph creation error: {e}")
@@ -1,10 +1,4 @@
-import pytesseract
-import cv2
-import numpy as np
-from PIL import Image
-import io
 import re
-from sympy import symbols, sympify
 
 class OCRParser:
     def __init__(self):
@@ -31,15 +25,73 @@ class OCRParser:
             'area': re.compile(r'area', re.IGNORECASE),
             'perimeter': re.compile(r'perimeter', re.IGNORECASE),
             'derivative': re.compile(r'derivative|d/dx', re.IGNORECASE),
-            'integral': re.compile(r'integral|∫', re.IGNORECASE)
+            'integral': re.compile(r'integral|∫', re.IGNORECASE),
+            'function': re.compile(r'[xy]\s*[+\-*/^]\s*[^=]+', re.IGNORECASE)
+        }
+        
+        # Common word problem patterns
+        self.word_patterns = {
+            'total': re.compile(r'total|altogether|sum', re.IGNORECASE),
+            'difference': re.compile(r'difference|more than|less than', re.IGNORECASE),
+            'product': re.compile(r'product|times', re.IGNORECASE),
+            'quotient': re.compile(r'quotient|divided by', re.IGNORECASE),
+            'perimeter': re.compile(r'perimeter|around', re.IGNORECASE),
+            'area': re.compile(r'area', re.IGNORECASE)
+        }
+        
+        # Numeric literals, shared by the geometry and word problem extractors
+        self._num_re = re.compile(r'\d+\.?\d*')
+        
+        # Text clean-up rules, combined into one alternation so clean_text
+        # walks the string once. Operator spacing comes first so it absorbs
+        # the surrounding whitespace; only the symbol names ignore case.
+        self._clean_re = re.compile(
+            r'\s*(?P<operator>[+\-*/=])\s*'
+            r'|(?P<one>[lI1]\s*\(\s*\))'   # Fix 1 being read as l or I
+            r'|(?P<zero>[O0]\s*\(\s*\))'   # Fix 0 being read as O
+            r'|(?P<two>\b[Z2]\b)'           # Fix 2 being read as Z
+            r'|(?P<sqrt>(?i:sqrt|sqr))'
+            r'|(?P<theta>(?i:theta))'
+            r'|(?P<phi>(?i:phi))'
+            r'|(?P<pi>(?i:pi))'
+        )
+        
+        # Question type markers, combined so determine_question_type scans the
+        # text once. Each alternative sits inside a lookahead so overlapping
+        # markers are all reported; the priority table decides between them.
+        self._type_re = re.compile(
+            r'(?=(?P<calculus>derivative|d/dx|integral|∫)'
+            r'|(?P<geometry>pythagoras|right\s+triangle|triangle|Δ|circle)'
+            r'|(?P<trigonometry>(?:sin|cos|tan)[^)])'
+            r'|(?P<equation>.\s*=\s*.))',
+            re.IGNORECASE
+        )
+        self._type_priority = {
+            'calculus': 0,
+            'geometry': 1,
+            'trigonometry': 2,
+            'equation': 3
+        }
+        self._clean_replacements = {
+            'one': '1',
+            'zero': '0',
+            'two': '2',
+            'sqrt': '√',
+            'theta': 'θ',
+            'phi': 'φ',
+            'pi': 'π'
         }
         return patterns
     
-    def parse_question(self, image_data, text_data=""):
-        """Main parsing function that extracts mathematical information"""
+    def parse_question(self, image_data, text_data="", preprocessed=False):
+        """Main parsing function that extracts mathematical information.
+
+        Pass ``preprocessed=True`` when ``image_data`` is already a
+        thresholded grayscale array, to skip the parser's own preprocessing.
+        """
         try:
-            # Extract text from image using OCR
-            ocr_text = self.extract_text_from_image(image_data)
+            # Extract text and confidence from image with a single OCR run
+            ocr_text, ocr_confidence = self._ocr(image_data, preprocessed)
             
             # Combine OCR text with provided text
             combined_text = f"{ocr_text} {text_data}".strip()
@@ -55,7 +107,7 @@ class OCRParser:
                 'type': question_type,
                 'content': content,
                 'original_text': cleaned_text,
-                'ocr_confidence': self.get_ocr_confidence(image_data)
+                'ocr_confidence': ocr_confidence
             }
         
         except Exception as e:
@@ -66,101 +118,116 @@ class OCRParser:
                 'needs_manual_review': True
             }
     
-    def extract_text_from_image(self, image_data):
-        """Extract text from image using OCR"""
+    def _ocr(self, image_data, preprocessed=False):
+        """Run OCR once and return the extracted text and average confidence"""
         try:
-            # Convert image data to PIL Image
+            # The OCR stack is imported lazily so text-only parsing never loads it
+            import io
+            import numpy as np
+            import pytesseract
+            from PIL import Image
+            
+            # Decode image data straight into a numpy array
             if isinstance(image_data, bytes):
-                image = Image.open(io.BytesIO(image_data))
+                image = np.asarray(Image.open(io.BytesIO(image_data)))
             else:
-                # Assume it's already a PIL Image
-                image = image_data
+                # Assume it's already a PIL Image or numpy array
+                image = np.asarray(image_data)
             
             # Preprocess image for better OCR
-            processed_image = self.preprocess_image(image)
+            processed_image = image if preprocessed else self.preprocess_image(image)
+            
+            # Get detailed OCR data; pytesseract accepts numpy arrays directly
+            data = pytesseract.image_to_data(processed_image, config=self.tesseract_config,
+                                             output_type=pytesseract.Output.DICT)
             
-            # Extract text
-            text = pytesseract.image_to_string(processed_image, config=self.tesseract_config)
+            # Rebuild the text and average the confidence of recognised words
+            words = []
+            conf_total = 0
+            conf_count = 0
+            for word, conf in zip(data['text'], data['conf']):
+                if word.strip():
+                    words.append(word)
+                conf = int(float(conf))
+                if conf > 0:
+                    conf_total += conf
+                    conf_count += 1
             
-            return text.strip()
+            confidence = conf_total / conf_count if conf_count else 0
+            return ' '.join(words), confidence
         
         except Exception as e:
             print(f"OCR extraction error: {e}")
-            return ""
+            return "", 0
     
-    def preprocess_image(self, image):
-        """Preprocess image for better OCR accuracy"""
+    def preprocess_image(self, image, aggressive_denoise=False):
+        """Preprocess image for better OCR accuracy.
+
+        Returns the thresholded image as a numpy array. A 3x3 median blur
+        is enough to clean up printed maths text; pass
+        ``aggressive_denoise=True`` to use the much slower non-local means
+        denoiser instead.
+        """
         try:
+            import cv2
+            import numpy as np
+            
             # Convert to numpy array if needed
-            if isinstance(image, Image.Image):
-                image = np.array(image)
+            image = np.asarray(image)
             
             # Convert to grayscale
             gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if len(image.shape) == 3 else image
             
             # Apply denoising
-            denoised = cv2.fastNlMeansDenoising(gray)
+            if aggressive_denoise:
+                denoised = cv2.fastNlMeansDenoising(gray)
+            else:
+                denoised = cv2.medianBlur(gray, 3)
             
             # Apply adaptive threshold
             thresh = cv2.adaptiveThreshold(denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                                          cv2.THRESH_BINARY, 11, 2)
             
-            # Morphological operations to clean up
-            kernel = np.ones((1, 1), np.uint8)
-            cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+            # No morphological close here: with a 1x1 kernel it is a no-op
             
-            return Image.fromarray(cleaned)
+            return thresh
         
         except Exception as e:
             print(f"Image preprocessing error: {e}")
-            return Image.fromarray(image) if isinstance(image, np.ndarray) else image
+            return image
     
     def clean_text(self, text):
         """Clean and normalize extracted text"""
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = ' '.join(text.split())
         
-        # Fix common OCR errors
-        text = re.sub(r'[lI1]\s*\(\s*\)', '1', text)  # Fix 1 being read as l or I
-        text = re.sub(r'[O0]\s*\(\s*\)', '0', text)  # Fix 0 being read as O
-        text = re.sub(r'\b[Z2]\b', '2', text)  # Fix 2 being read as Z
-        
-        # Normalize mathematical symbols
-        text = re.sub(r'sqr|sqrt', '√', text, flags=re.IGNORECASE)
-        text = re.sub(r'theta', 'θ', text, flags=re.IGNORECASE)
-        text = re.sub(r'phi', 'φ', text, flags=re.IGNORECASE)
-        text = re.sub(r'pi', 'π', text, flags=re.IGNORECASE)
-        
-        # Fix spacing around operators
-        text = re.sub(r'\s*([+\-*/=])\s*', r' \1 ', text)
+        # Fix common OCR errors, normalize mathematical symbols and fix
+        # spacing around operators in a single pass
+        text = self._clean_re.sub(self._clean_sub, text)
         
         return text.strip()
     
+    def _clean_sub(self, match):
+        """Return the replacement for a match of the clean-up alternation"""
+        kind = match.lastgroup
+        if kind == 'operator':
+            return f" {match.group('operator')} "
+        return self._clean_replacements[kind]
+    
     def determine_question_type(self, text):
         """Determine the type of mathematical question"""
-        text_lower = text.lower()
-        
-        # Check for calculus
-        if self.math_patterns['derivative'].search(text_lower):
-            return 'calculus'
-        if self.math_patterns['integral'].search(text_lower):
-            return 'calculus'
-        
-        # Check for geometry
-        if self.math_patterns['pythagoras'].search(text_lower):
-            return 'geometry'
-        if self.math_patterns['triangle'].search(text_lower):
-            return 'geometry'
-        if self.math_patterns['circle'].search(text_lower):
-            return 'geometry'
-        
-        # Check for trigonometry
-        if self.math_patterns['trigonometry'].search(text):
-            return 'trigonometry'
+        # Calculus beats geometry, which beats trigonometry, which beats
+        # equations; stop as soon as the highest priority type is seen
+        question_type = None
+        for match in self._type_re.finditer(text):
+            found = match.lastgroup
+            if found == 'calculus':
+                return found
+            if question_type is None or self._type_priority[found] < self._type_priority[question_type]:
+                question_type = found
         
-        # Check for equations
-        if self.math_patterns['equation'].search(text):
-            return 'equation'
+        if question_type is not None:
+            return question_type
         
         # Check for algebraic expressions
         if any(var in text for var in ['x', 'y', 'z']) and not '=' in text:
@@ -192,14 +259,18 @@ class OCRParser:
     
     def extract_trigonometry(self, text):
         """Extract trigonometric expressions"""
-        matches = self.math_patterns['trigonometry'].findall(text)
-        if matches:
-            trig_functions = []
-            for match in matches:
-                func, arg = match
-                trig_functions.append(f"{func}({arg})")
-            return trig_functions[0] if len(trig_functions) == 1 else trig_functions
-        return text
+        matches = self.math_patterns['trigonometry'].finditer(text)
+        first = next(matches, None)
+        if first is None:
+            return text
+        
+        # Most questions have a single expression, so only build a list
+        # when a second one turns up
+        second = next(matches, None)
+        if second is None:
+            return f"{first.group(1)}({first.group(2)})"
+        
+        return [f"{match.group(1)}({match.group(2)})" for match in (first, second, *matches)]
     
     def extract_geometry(self, text):
         """Extract geometric information"""
@@ -209,22 +280,34 @@ class OCRParser:
         }
         
         # Determine shape
-        if self.math_patterns['triangle'].search(text.lower()):
+        if self.math_patterns['triangle'].search(text):
             geometry_info['shape'] = 'triangle'
-        elif self.math_patterns['circle'].search(text.lower()):
+        elif self.math_patterns['circle'].search(text):
             geometry_info['shape'] = 'circle'
-        elif self.math_patterns['pythagoras'].search(text.lower()):
+        elif self.math_patterns['pythagoras'].search(text):
             geometry_info['shape'] = 'pythagoras'
         
-        # Extract numerical values
-        numbers = re.findall(r'\d+\.?\d*', text)
-        if len(numbers) >= 1:
-            geometry_info['properties']['values'] = [float(n) for n in numbers]
+        # Extract numerical values and angles in a single pass; a number
+        # followed by a degree sign (optionally after whitespace) is an angle
+        values = []
+        angles = []
+        length = len(text)
+        for match in self._num_re.finditer(text):
+            value = float(match.group())
+            values.append(value)
+            
+            end = match.end()
+            while end < length and text[end].isspace():
+                end += 1
+            if end < length and text[end] == '°':
+                # Whole angles stay ints; fractional ones such as 13.5° are
+                # kept as floats rather than truncated
+                angles.append(int(value) if value.is_integer() else value)
         
-        # Extract angle values
-        angles = self.math_patterns['angle'].findall(text)
+        if values:
+            geometry_info['properties']['values'] = values
         if angles:
-            geometry_info['properties']['angles'] = [int(a) for a in angles]
+            geometry_info['properties']['angles'] = angles
         
         return geometry_info
     
@@ -236,57 +319,26 @@ class OCRParser:
         }
         
         # Determine operation
-        if self.math_patterns['derivative'].search(text.lower()):
+        if self.math_patterns['derivative'].search(text):
             calc_info['operation'] = 'derivative'
-        elif self.math_patterns['integral'].search(text.lower()):
+        elif self.math_patterns['integral'].search(text):
             calc_info['operation'] = 'integral'
         
         # Extract function (simplified - look for expressions with x)
-        x_pattern = re.compile(r'[xy]\s*[+\-*/^]\s*[^=]+', re.IGNORECASE)
-        matches = x_pattern.findall(text)
-        if matches:
-            calc_info['function'] = matches[0].strip()
+        match = self.math_patterns['function'].search(text)
+        if match:
+            calc_info['function'] = match.group().strip()
         
         return calc_info
     
-    def get_ocr_confidence(self, image_data):
-        """Get OCR confidence score"""
-        try:
-            if isinstance(image_data, bytes):
-                image = Image.open(io.BytesIO(image_data))
-            else:
-                image = image_data
-            
-            # Get detailed OCR data
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-            
-            # Calculate average confidence
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-            
-            return sum(confidences) / len(confidences) if confidences else 0
-        
-        except Exception as e:
-            print(f"OCR confidence calculation error: {e}")
-            return 0
-    
     def parse_word_problem(self, text):
         """Parse word problems and convert to mathematical expressions"""
-        # Common word problem patterns
-        patterns = {
-            'total': re.compile(r'total|altogether|sum', re.IGNORECASE),
-            'difference': re.compile(r'difference|more than|less than', re.IGNORECASE),
-            'product': re.compile(r'product|times', re.IGNORECASE),
-            'quotient': re.compile(r'quotient|divided by', re.IGNORECASE),
-            'perimeter': re.compile(r'perimeter|around', re.IGNORECASE),
-            'area': re.compile(r'area', re.IGNORECASE)
-        }
-        
         # Extract numbers
-        numbers = re.findall(r'\d+\.?\d*', text)
+        numbers = self._num_re.findall(text)
         
         # Determine operation based on keywords
         operation = 'unknown'
-        for op, pattern in patterns.items():
+        for op, pattern in self.word_patterns.items():
             if pattern.search(text):
                 operation = op
                 break
@@ -294,6 +346,6 @@ class OCRParser:
         return {
             'type': 'word_problem',
             'operation': operation,
-            'numbers': [float(n) for n in numbers],
+            'numbers': list(map(float, numbers)),
             'text': text
         }
\ No newline at end of file
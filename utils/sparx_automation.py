@@ -4,61 +4,196 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
+import os
+import sys
+import re
+import logging
 import time
 import random
 import json
+import base64
+import functools
+import hashlib
+import collections
+import threading
+import multiprocessing
+import concurrent.futures
+import numpy as np
 from utils.math_solver import MathSolver
 from utils.ocr_parser import OCRParser
 
+log = logging.getLogger(__name__)
+
+# Screenshots are normalised to fit this canvas before OCR
+MAX_SCREENSHOT_SIZE = (1920, 1080)
+
+# Number of OCR and solver results remembered per automation
+RESULT_CACHE_SIZE = 256
+
+# Image requests blocked while browsing; only question screenshots need them
+BLOCKED_IMAGE_URLS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico"]
+
+# Whitespace removed from answers before they are typed
+_STRIP = re.compile(r"\s+")
+
+SPARX_ORIGIN = "https://maths.sparx-learning.com"
+
+# Limit for the async scripts run in the page, in milliseconds
+SCRIPT_TIMEOUT_MS = 5000
+
+# Persistent browser cache so subresources survive restarts
+CHROME_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sparx-chrome")
+
+# Parser and solver used inside worker processes, created once per worker
+@functools.lru_cache(maxsize=None)
+def _worker_ocr_parser():
+    return OCRParser()
+
+@functools.lru_cache(maxsize=None)
+def _worker_math_solver():
+    return MathSolver()
+
+def _parse(question_image, question_text):
+    """Parse a question in a worker process"""
+    return _worker_ocr_parser().parse_question(question_image, question_text, preprocessed=True)
+
+def _solve(parsed_question):
+    """Solve an already parsed question in a worker process"""
+    return _worker_math_solver().solve(parsed_question)
+
+def downsample_screenshot(png_bytes):
+    """Shrink and binarise a PNG screenshot so Tesseract has fewer pixels to read.
+
+    The image is fitted to ``MAX_SCREENSHOT_SIZE``, halved if it is still
+    wider than 960px, converted to grayscale and Otsu thresholded. Returns
+    the result as a numpy array ready for ``OCRParser.parse_question`` with
+    ``preprocessed=True``.
+    """
+    import cv2
+    
+    image = cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("Could not decode question screenshot")
+    
+    height, width = image.shape
+    max_width, max_height = MAX_SCREENSHOT_SIZE
+    scale = min(max_width / width, max_height / height, 1.0)
+    if width * scale > max_width / 2:
+        scale *= 0.5
+    if scale < 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return image
+
 class SparxAutomation:
-    def __init__(self):
+    # Locators for the per-question elements, built once
+    QT_LOC = (By.CSS_SELECTOR, ".question-text")
+    QC_LOC = (By.CSS_SELECTOR, ".question-container")
+    ANS_LOC = (By.CSS_SELECTOR, ".answer-input")
+    SUB_LOC = (By.CSS_SELECTOR, ".submit-button")
+    FB_LOC = (By.CSS_SELECTOR, ".feedback-icon")
+    NEXT_LOC = (By.CSS_SELECTOR, ".next-question-button")
+    
+    def __init__(self, executor=None, solver_workers=None):
+        """Create the automation.
+
+        If ``executor`` is given (e.g. a ``ProcessPoolExecutor``), OCR and
+        solving run there instead of on the thread driving the browser.
+        Otherwise, if ``solver_workers`` is set, a process pool of that size is
+        created on first use and shut down by ``quit``.
+        """
         self.driver = None
+        self.executor = executor
+        self._solver_workers = solver_workers
+        self._owns_executor = False
+        self._executor_lock = threading.Lock()
+        self._timer_period_raised = False
         self.math_solver = MathSolver()
         self.ocr_parser = OCRParser()
         self.current_book = None
         self.total_questions = 0
         self.questions_solved = 0
+        self.reset_stats()
+        
+        # Tesseract runs as a subprocess, so threads are enough to OCR
+        # several prefetched questions at once
+        self._ocr_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self._solution_futures = {}
+        
+        # Retries and re-served questions reuse earlier OCR and solver output
+        # OCR threads and the driver thread share them, so they are locked
+        self._ocr_cache = collections.OrderedDict()
+        self._solve_cache = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
         
     def init_driver(self):
+        stealth = bool(os.environ.get("SPARX_STEALTH"))
+        
         chrome_options = Options()
-        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--headless=new")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options.add_argument(f"--disk-cache-dir={CHROME_CACHE_DIR}")
+        # Return from navigation at DOMContentLoaded; explicit waits cover the rest
+        chrome_options.page_load_strategy = "eager"
+        if stealth:
+            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            chrome_options.add_experimental_option('useAutomationExtension', False)
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        # Without an explicit driver path Selenium Manager resolves chromedriver
+        # and caches it (under SE_CACHE_PATH if set), so later launches stay offline
+        chromedriver_path = os.environ.get("CHROMEDRIVER_PATH")
+        if chromedriver_path:
+            self.driver = webdriver.Chrome(service=Service(chromedriver_path), options=chrome_options)
+        else:
+            self.driver = webdriver.Chrome(options=chrome_options)
+        if stealth:
+            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
-    def human_like_typing(self, element, text, min_delay=0.05, max_delay=0.15):
-        """Type text with human-like delays"""
-        for char in text:
-            element.send_keys(char)
-            time.sleep(random.uniform(min_delay, max_delay))
+        if sys.platform == "win32" and not self._timer_period_raised:
+            # Windows sleeps in 15.6 ms ticks by default; ask for 1 ms timer
+            # resolution while the browser is running
+            import ctypes
+            ctypes.windll.winmm.timeBeginPeriod(1)
+            self._timer_period_raised = True
+        
+        # Skip downloading page imagery; capture_question lifts the block
+        # when a question contains images
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.set_images_blocked(True)
+        
+        # Bounds the async scripts waiting on images and answer feedback
+        self.driver.set_script_timeout(SCRIPT_TIMEOUT_MS / 1000)
     
-    def random_delay(self, min_seconds, max_seconds):
-        """Add random delay between actions.
+    def set_images_blocked(self, blocked):
+        """Block or allow image requests through the DevTools protocol"""
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs",
+                                    {"urls": BLOCKED_IMAGE_URLS if blocked else []})
+        
+    def human_like_typing(self, element, text, min_delay=0.05, max_delay=0.15):
+        """Type text so that it takes at least a short random pause.
 
-        This helper previously used ``time.sleep`` directly, which can block the
-        browser for an arbitrary amount of time. We still use a sleep here
-        because a truly human‑like pause has no expected condition to wait
-        for, but the delay is returned so callers can decide if they really
-        need it. Consider replacing calls to this method with explicit waits
-        where the code is waiting for a page element or state change rather
-        than just burning time.
+        The whole string goes out in one ``send_keys`` call; typing it a
+        character at a time cost one WebDriver round-trip per character.
+        The pause runs against a deadline, so time spent in ``send_keys``
+        counts towards it and only the remainder is slept.
         """
-        delay = random.uniform(min_seconds, max_seconds)
-        time.sleep(delay)
-        return delay
+        deadline = time.perf_counter() + random.uniform(min_delay, max_delay)
+        element.send_keys(text)
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
     
     def login(self, school_name, username, password):
         try:
-            self.init_driver()
-            self.driver.get("https://maths.sparx-learning.com")
+            # Launching Chrome is slow, so keep an existing browser for re-logins
+            if self.driver is None:
+                self.init_driver()
+            self.driver.get(SPARX_ORIGIN)
             
             # Wait for page to load
             WebDriverWait(self.driver, 10).until(
@@ -70,7 +205,6 @@ class SparxAutomation:
                 EC.element_to_be_clickable((By.ID, "school-input"))
             )
             self.human_like_typing(school_input, school_name)
-            self.random_delay(1, 2)
             
             # Handle school dropdown if it appears
             try:
@@ -81,23 +215,24 @@ class SparxAutomation:
                 school_options = school_dropdown.find_elements(By.CLASS_NAME, "school-option")
                 if school_options:
                     school_options[0].click()
-            except:
+            except TimeoutException:
                 pass  # No dropdown appeared
             
-            # Find username and password fields
+            # Enter credentials, waiting on each field instead of sleeping
             username_input = WebDriverWait(self.driver, 10).until(
                 EC.element_to_be_clickable((By.ID, "username-input"))
             )
-            password_input = self.driver.find_element(By.ID, "password-input")
-            
-            # Enter credentials with human-like typing
             self.human_like_typing(username_input, username)
-            self.random_delay(0.5, 1.5)
+            
+            password_input = WebDriverWait(self.driver, 10).until(
+                EC.element_to_be_clickable((By.ID, "password-input"))
+            )
             self.human_like_typing(password_input, password)
-            self.random_delay(0.5, 1)
             
             # Click login button
-            login_button = self.driver.find_element(By.CLASS_NAME, "login-button")
+            login_button = WebDriverWait(self.driver, 10).until(
+                EC.element_to_be_clickable((By.CLASS_NAME, "login-button"))
+            )
             login_button.click()
             
             # Wait for login to complete
@@ -107,34 +242,40 @@ class SparxAutomation:
             
             return True
             
-        except Exception as e:
-            print(f"Login error: {e}")
+        except Exception:
+            log.exception("Login error")
             return False
     
     def detect_homework(self):
         """Detect current homework book and total questions"""
         try:
-            # Look for homework books
-            homework_elements = self.driver.find_elements(By.CLASS_NAME, "homework-book")
+            # Find the active book in one script call instead of querying
+            # each element's attributes through WebDriver
+            book_info = self.driver.execute_script("""
+                const book = [...document.querySelectorAll('.homework-book')]
+                    .find(el => /active|current/.test(el.className));
+                if (!book) return null;
+                const count = book.querySelector('.question-count');
+                return {
+                    name: book.querySelector('.book-name').innerText,
+                    count: count ? count.innerText : null
+                };
+            """)
+            if not book_info:
+                return False
             
-            for element in homework_elements:
-                if "active" in element.get_attribute("class") or "current" in element.get_attribute("class"):
-                    book_name = element.find_element(By.CLASS_NAME, "book-name").text
-                    self.current_book = book_name
-                    
-                    # Extract total questions
-                    try:
-                        question_info = element.find_element(By.CLASS_NAME, "question-count").text
-                        self.total_questions = int(question_info.split("/")[-1])
-                    except:
-                        self.total_questions = 12  # Default assumption
-                    
-                    return True
+            self.current_book = book_info['name']
             
-            return False
+            # Extract total questions
+            try:
+                self.total_questions = int(book_info['count'].split("/")[-1])
+            except (AttributeError, ValueError):
+                self.total_questions = 12  # Default assumption
+            
+            return True
             
-        except Exception as e:
-            print(f"Homework detection error: {e}")
+        except Exception:
+            log.exception("Homework detection error")
             return False
     
     def solve_homework(self, min_delay=8, max_delay=25, ethical_mode=False, progress_callback=None):
@@ -142,6 +283,7 @@ class SparxAutomation:
         try:
             if not self.detect_homework():
                 raise Exception("Could not detect homework")
+            self.reset_stats()
             
             # Navigate into homework
             homework_link = WebDriverWait(self.driver, 10).until(
@@ -150,9 +292,12 @@ class SparxAutomation:
             homework_link.click()
             # Wait for the first question to load rather than sleeping arbitrarily.
             WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "question-text"))
+                EC.presence_of_element_located(self.QT_LOC)
             )
             
+            # Start OCR for every question the page already exposes
+            self.prefetch_questions()
+            
             # Main solving loop
             for question_num in range(1, self.total_questions + 1):
                 self.solve_current_question(question_num, ethical_mode, progress_callback)
@@ -162,31 +307,117 @@ class SparxAutomation:
                     self.navigate_to_next_question()
                     # Wait for the next question to become present instead of using a fixed delay.
                     WebDriverWait(self.driver, max_delay).until(
-                        EC.presence_of_element_located((By.CLASS_NAME, "question-text"))
+                        EC.presence_of_element_located(self.QT_LOC)
                     )
             
-        except Exception as e:
-            print(f"Homework solving error: {e}")
+        except Exception:
+            log.exception("Homework solving error")
             raise
     
+    def prefetch_questions(self):
+        """Screenshot all questions present in the page and solve them in the background.
+
+        A future of ``(parsed_question, solution)`` is stored per question
+        number in ``self._solution_futures``; with a multi-process executor
+        several questions are solved in parallel. If the page only renders the
+        current question there is nothing to prefetch and each question is
+        parsed when it is reached.
+        """
+        self._solution_futures = {}
+        containers = self.driver.find_elements(*self.QC_LOC)
+        if len(containers) < 2:
+            return
+        
+        try:
+            for question_num, container in enumerate(containers, start=1):
+                text_elements = container.find_elements(*self.QT_LOC)
+                question_text = text_elements[0].text if text_elements else ""
+                question_image = self.capture_question(container)
+                self._solution_futures[question_num] = self._ocr_pool.submit(
+                    self._parse_and_solve, question_image, question_text
+                )
+        except Exception:
+            # Questions that could not be captured are parsed when reached
+            log.exception("Question prefetch error")
+    
+    def capture_question(self, container=None):
+        """Screenshot a question container, downsampled for OCR"""
+        if container is None:
+            container = self.driver.find_element(*self.QC_LOC)
+        
+        if not container.find_elements(By.TAG_NAME, "img"):
+            return downsample_screenshot(self.screenshot_element(container))
+        
+        # Diagrams are part of the question, so load them before capturing.
+        # Images that never fire load/error (e.g. lazy ones off screen) are
+        # given up on just before the script timeout; the screenshot is
+        # taken either way
+        self.set_images_blocked(False)
+        try:
+            self.driver.execute_async_script("""
+                const container = arguments[0];
+                const timeoutMs = arguments[1];
+                const done = arguments[arguments.length - 1];
+                setTimeout(done, timeoutMs);
+                Promise.all([...container.querySelectorAll('img')].map(img =>
+                    new Promise(resolve => {
+                        if (img.complete && img.naturalWidth) return resolve();
+                        img.addEventListener('load', resolve, {once: true});
+                        img.addEventListener('error', resolve, {once: true});
+                        img.loading = 'eager';
+                        img.src = img.src;
+                    })
+                )).then(() => done());
+            """, container, SCRIPT_TIMEOUT_MS - 500)
+        except TimeoutException:
+            log.warning("Question images did not finish loading before the screenshot")
+        finally:
+            self.set_images_blocked(True)
+        return downsample_screenshot(self.screenshot_element(container))
+    
+    def screenshot_element(self, element):
+        """Capture just the element's area with one DevTools call.
+
+        ``element.screenshot_as_png`` renders a full page screenshot and crops
+        it; here the browser is asked for the clipped region directly.
+        """
+        rect = element.rect
+        device_pixel_ratio = self.driver.execute_script("return window.devicePixelRatio") or 1
+        clip = {
+            "x": rect["x"],
+            "y": rect["y"],
+            "width": rect["width"],
+            "height": rect["height"],
+            "scale": 1 / device_pixel_ratio
+        }
+        # Prefetched containers may sit below the fold, so allow capturing
+        # outside the viewport
+        screenshot = self.driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "clip": clip,
+            "format": "png",
+            "captureBeyondViewport": True
+        })
+        return base64.b64decode(screenshot["data"])
+    
     def solve_current_question(self, question_num, ethical_mode=False, progress_callback=None):
         """Solve the current question"""
+        start = time.perf_counter()
         try:
             # Extract question
             question_element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "question-text"))
+                EC.presence_of_element_located(self.QT_LOC)
             )
             question_text = question_element.text
             
-            # Take screenshot for OCR if needed
-            question_screenshot = self.driver.find_element(By.CLASS_NAME, "question-container")
-            question_image = question_screenshot.screenshot_as_png
-            
-            # Parse question using OCR and text
-            parsed_question = self.ocr_parser.parse_question(question_image, question_text)
-            
-            # Solve using math engine
-            solution = self.math_solver.solve(parsed_question)
+            solution_future = self._solution_futures.pop(question_num, None)
+            if solution_future is not None:
+                # Already solved in the background by prefetch_questions
+                parsed_question, solution = solution_future.result()
+            else:
+                # Take screenshot for OCR, parse it together with the text
+                # and solve using math engine
+                question_image = self.capture_question()
+                parsed_question, solution = self._parse_and_solve(question_image, question_text)
             
             if ethical_mode:
                 # Show solution steps
@@ -199,14 +430,15 @@ class SparxAutomation:
             is_correct = self.check_answer_feedback()
             
             # Update progress
-            if is_correct:
-                self.questions_solved += 1
+            index = question_num - 1
+            self.solved_mask[index] = is_correct
+            self.questions_solved = int(self.solved_mask.sum())
             
             if progress_callback:
                 progress_callback({
                     'questions_solved': self.questions_solved,
                     'total_questions': self.total_questions,
-                    'accuracy': (self.questions_solved / question_num) * 100,
+                    'accuracy': float(self.solved_mask[:question_num].mean()) * 100,
                     'current_question': f"Q{question_num}: {question_text[:50]}..."
                 })
             
@@ -215,58 +447,176 @@ class SparxAutomation:
                 for alt_solution in solution['alternatives']:
                     self.input_answer(alt_solution)
                     if self.check_answer_feedback():
-                        self.questions_solved += 1
+                        self.solved_mask[index] = True
+                        self.questions_solved = int(self.solved_mask.sum())
                         break
         
-        except Exception as e:
-            print(f"Question solving error: {e}")
+        except Exception:
+            log.exception("Question solving error")
+        
+        finally:
+            if question_num <= len(self.q_time_ms):
+                self.q_time_ms[question_num - 1] = (time.perf_counter() - start) * 1000
+    
+    def reset_stats(self):
+        """Allocate per-question result arrays for the detected homework.
+
+        ``solved_mask`` records which questions were answered correctly and
+        ``q_time_ms`` how long each one took, so summaries such as accuracy
+        are single numpy reductions.
+        """
+        self.solved_mask = np.zeros(self.total_questions, dtype=bool)
+        self.q_time_ms = np.zeros(self.total_questions, dtype=np.float32)
+        self.questions_solved = 0
+    
+    def _parse_and_solve(self, question_image, question_text):
+        """Parse and solve a question, returning both results"""
+        parsed_question = self.parse_question(question_image, question_text)
+        return parsed_question, self.solve_question(parsed_question)
+    
+    def parse_question(self, question_image, question_text):
+        """OCR and parse a question, reusing the result for identical screenshots"""
+        hasher = hashlib.blake2b(question_image, digest_size=16)
+        hasher.update(repr(question_image.shape).encode())
+        hasher.update(question_text.encode())
+        key = hasher.digest()
+        
+        parsed_question = self._cache_get(self._ocr_cache, key)
+        if parsed_question is None:
+            executor = self._get_executor()
+            if executor is not None:
+                # Parse off this thread, keeping the GIL free for the web server
+                parsed_question = executor.submit(_parse, question_image, question_text).result()
+            else:
+                parsed_question = self.ocr_parser.parse_question(question_image, question_text,
+                                                                 preprocessed=True)
+            # The parser swallows Tesseract failures and reports zero
+            # confidence, so only cache results where OCR actually read text
+            if parsed_question.get('ocr_confidence'):
+                self._cache_put(self._ocr_cache, key, parsed_question)
+        return parsed_question
+    
+    def solve_question(self, parsed_question):
+        """Solve a parsed question, reusing the result for identical questions"""
+        key = json.dumps(parsed_question, sort_keys=True, default=str)
+        
+        solution = self._cache_get(self._solve_cache, key)
+        if solution is None:
+            executor = self._get_executor()
+            if executor is not None:
+                solution = executor.submit(_solve, parsed_question).result()
+            else:
+                solution = self.math_solver.solve(parsed_question)
+            self._cache_put(self._solve_cache, key, solution)
+        return solution
+    
+    def _get_executor(self):
+        """Return the executor for OCR and solving, or None to run them inline"""
+        if self.executor is None and self._solver_workers:
+            with self._executor_lock:
+                if self.executor is None:
+                    # Spawn rather than fork: the browser, OCR and server
+                    # threads are already running by the time this is called
+                    self.executor = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self._solver_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                    self._owns_executor = True
+        return self.executor
+    
+    def _cache_get(self, cache, key):
+        """Look up a cached result and mark it as recently used"""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+    
+    def _cache_put(self, cache, key, value):
+        """Store a result, evicting the least recently used one when full.
+
+        Fallback results flagged ``needs_manual_review`` are not stored, so a
+        transient OCR or solver failure is retried next time.
+        """
+        if value.get('needs_manual_review'):
+            return
+        with self._cache_lock:
+            cache[key] = value
+            if len(cache) > RESULT_CACHE_SIZE:
+                cache.popitem(last=False)
     
     def input_answer(self, answer):
         """Input the answer with human-like behavior"""
         try:
             # Find answer input field
             answer_input = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CLASS_NAME, "answer-input"))
+                EC.element_to_be_clickable(self.ANS_LOC)
             )
             
             # Clear existing content
             answer_input.clear()
-            self.random_delay(0.5, 1)
             
             # Type answer
-            self.human_like_typing(answer_input, str(answer))
-            self.random_delay(0.5, 1)
+            self.human_like_typing(answer_input, _STRIP.sub("", str(answer)))
             
-            # Submit answer
-            submit_button = self.driver.find_element(By.CLASS_NAME, "submit-button")
+            # Submit answer as soon as the button accepts clicks
+            submit_button = WebDriverWait(self.driver, 10).until(
+                EC.element_to_be_clickable(self.SUB_LOC)
+            )
             submit_button.click()
             
-        except Exception as e:
-            print(f"Answer input error: {e}")
+        except Exception:
+            log.exception("Answer input error")
     
     def check_answer_feedback(self):
         """Check if the answer was marked correct"""
         try:
-            # Wait for feedback
-            WebDriverWait(self.driver, 5).until(
-                lambda driver: driver.find_element(By.CLASS_NAME, "feedback-icon").is_displayed()
-            )
-            
-            feedback_element = self.driver.find_element(By.CLASS_NAME, "feedback-icon")
-            return "correct" in feedback_element.get_attribute("class")
+            # Let the page report the verdict as soon as the feedback icon
+            # gets its class, instead of polling it over WebDriver
+            return self.driver.execute_async_script("""
+                const selector = arguments[0];
+                const timeoutMs = arguments[1];
+                const done = arguments[arguments.length - 1];
+                const verdict = () => {
+                    const icon = document.querySelector(selector);
+                    if (!icon) return null;
+                    if (icon.classList.contains('correct')) return true;
+                    if (icon.classList.contains('incorrect')) return false;
+                    return null;
+                };
+                const result = verdict();
+                if (result !== null) return done(result);
+                const observer = new MutationObserver(() => {
+                    const result = verdict();
+                    if (result !== null) {
+                        observer.disconnect();
+                        clearTimeout(timer);
+                        done(result);
+                    }
+                });
+                // Give up (as incorrect) just before the script timeout so the
+                // observer never outlives this check
+                const timer = setTimeout(() => {
+                    observer.disconnect();
+                    done(false);
+                }, timeoutMs);
+                observer.observe(document.body, {
+                    attributes: true, attributeFilter: ['class'], childList: true, subtree: true
+                });
+            """, self.FB_LOC[1], SCRIPT_TIMEOUT_MS - 500)
         
-        except:
+        except TimeoutException:
             return False  # Assume incorrect if no feedback
     
     def navigate_to_next_question(self):
         """Navigate to the next question"""
         try:
             next_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CLASS_NAME, "next-question-button"))
+                EC.element_to_be_clickable(self.NEXT_LOC)
             )
             next_button.click()
-        except Exception as e:
-            print(f"Navigation error: {e}")
+        except Exception:
+            log.exception("Navigation error")
     
     def show_solution_steps(self, solution):
         """Display solution steps in ethical mode"""
@@ -274,7 +624,40 @@ class SparxAutomation:
         # Implementation would depend on the UI design
         pass
     
+    def reset_session(self):
+        """Drop the Sparx session but keep the browser for the next login.
+
+        delete_all_cookies only covers the current origin, so cookies are
+        cleared browser-wide and Sparx's local/session storage is wiped too,
+        leaving nothing of the previous account behind.
+        """
+        if self.driver:
+            self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            self.driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                        {"origin": SPARX_ORIGIN, "storageTypes": "all"})
+        self.current_book = None
+        self.total_questions = 0
+        self.reset_stats()
+        self._solution_futures = {}
+        with self._cache_lock:
+            self._ocr_cache.clear()
+            self._solve_cache.clear()
+    
     def quit(self):
         """Clean up and close the browser"""
-        if self.driver:
-            self.driver.quit()
+        # Close Chrome first so a failure below can never leave it running
+        try:
+            if self.driver:
+                self.driver.quit()
+                self.driver = None
+        finally:
+            self._ocr_pool.shutdown(wait=False)
+            if self._owns_executor:
+                # cancel_futures needs Python 3.9; workers exit once idle
+                self.executor.shutdown(wait=False)
+                self.executor = None
+                self._owns_executor = False
+            if self._timer_period_raised:
+                import ctypes
+                ctypes.windll.winmm.timeEndPeriod(1)
+                self._timer_period_raised = False